@@ -39,6 +39,9 @@ class Entity(BaseModel):
 
 app = FastAPI()
 
+# (full size, reduced size) matrix of --projection, None to return the full encodings
+projection = None
+
 @app.post('/api/blink/biencoder/mention/doc')
 # remember `content-type: application/json`
 async def encode_mention_from_doc(doc: dict = Body(...)):
@@ -139,6 +142,8 @@ def _run_biencoder_mention(biencoder, dataloader):
         with torch.no_grad():
             context_input = context_input.to(biencoder.device)
             context_encoding = biencoder.encode_context(context_input).numpy()
+            if projection is not None:
+                context_encoding = context_encoding @ projection
             context_encoding = np.ascontiguousarray(context_encoding)
         encodings.extend(context_encoding)
     return encodings
@@ -151,6 +156,8 @@ def _run_biencoder_entity(biencoder, dataloader):
         cands = cands.to(biencoder.device)
         with torch.no_grad():
             cand_encode = biencoder.encode_candidate(cands).numpy()
+            if projection is not None:
+                cand_encode = cand_encode @ projection
             cand_encode = np.ascontiguousarray(cand_encode)
         cand_encode_list.extend(cand_encode)
     return cand_encode_list
@@ -180,6 +187,16 @@ if __name__ == '__main__':
         default="models/biencoder_wiki_large.json",
         help="Path to the biencoder configuration.",
     )
+    parser.add_argument(
+        "--projection",
+        dest="projection",
+        type=str,
+        default=None,
+        help="Path to a projection (<index>.projection.npz built by indexer/project_index.py) applied to " \
+            "the mention and entity encodings. The indexer must then run with --vector-size equal to the projected size: " \
+            "every index, the rw one included, must be a projected index or hold projected vectors " \
+            "(the indexer checks it at startup). The exact re-ranking of the indexer is not available.",
+    )
     parser.add_argument(
         "--host", type=str, default="127.0.0.1", help="host to listen at",
     )
@@ -194,6 +211,10 @@ if __name__ == '__main__':
     print('Loading biencoder...')
     biencoder, biencoder_params = load_models(args)
     print('Device:', biencoder.device)
+    if args.projection:
+        with np.load(args.projection) as _projection:
+            projection = np.ascontiguousarray(_projection['matrix'], dtype=np.float32)
+        print('Projection: {} -> {} dims'.format(projection.shape[0], projection.shape[1]))
     print('Loading complete.')
 
     uvicorn.run(app, host = args.host, port = args.port)
@@ -0,0 +1,80 @@
+import argparse
+import time
+import numpy as np
+import faiss
+from main import HNSWIndexer
+from build_utils import load_vectors, recall
+
+# Builds an hnswip index (inner product HNSW graph accepting adds, e.g. --index hnswip+models/kb_hnsw.faiss+0+ro)
+# from vectors on disk: a DenseFlatIndexer file or a .npy (n, d) float32 matrix (memory-mapped).
+# faiss inserts each batch with all the OpenMP threads (--threads). Measures the recall@k against
+# the exact search for some efSearch values.
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input", type=str, required=True, help="DenseFlatIndexer file or .npy matrix of the vectors",
+    )
+    parser.add_argument(
+        "--output", type=str, required=True, help="hnswip index file to write",
+    )
+    parser.add_argument(
+        "--m", type=int, default=32, help="neighbors per node of the graph",
+    )
+    parser.add_argument(
+        "--ef-construction", type=int, default=200, dest="ef_construction", help="candidate list size while inserting",
+    )
+    parser.add_argument(
+        "--ef-search", type=int, default=128, dest="ef_search", help="efSearch saved in the index",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=None, help="OpenMP threads (default: all the cores)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100000, help="vectors inserted per batch", dest="batch_size",
+    )
+    parser.add_argument(
+        "--eval-size", type=int, default=1000, help="kb vectors used as queries for the recall evaluation (0 to skip)",
+        dest="eval_size",
+    )
+    parser.add_argument(
+        "--eval-ef-search", type=str, default="32,64,128,256", dest="eval_ef_search",
+        help="comma separated efSearch values of the recall evaluation",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=10, help="top_k of the recall evaluation", dest="top_k",
+    )
+
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        faiss.omp_set_num_threads(args.threads)
+
+    print('Loading vectors from {}...'.format(args.input))
+    vectors = load_vectors(args.input)
+    ntotal, dim = vectors.shape
+
+    indexer = HNSWIndexer(dim, args.m, args.ef_construction, args.ef_search)
+    print('Building hnswip index of {} vectors (M {}, efConstruction {}, {} threads)...'.format(
+        ntotal, args.m, args.ef_construction, faiss.omp_get_max_threads()))
+    start = time.time()
+    for i in range(0, ntotal, args.batch_size):
+        indexer.index_data(np.ascontiguousarray(vectors[i:i + args.batch_size], dtype=np.float32))
+        done = min(i + args.batch_size, ntotal)
+        print('{} / {} vectors ({:.0f} vectors/s)'.format(done, ntotal, done / (time.time() - start)))
+    indexer.serialize(args.output)
+    print('Built in {:.1f}s'.format(time.time() - start))
+
+    if args.eval_size > 0:
+        rng = np.random.default_rng(0)
+        queries = np.ascontiguousarray(
+            vectors[np.sort(rng.choice(ntotal, min(args.eval_size, ntotal), replace=False))], dtype=np.float32)
+        exact = faiss.IndexFlatIP(dim)
+        for i in range(0, ntotal, args.batch_size):
+            exact.add(np.ascontiguousarray(vectors[i:i + args.batch_size], dtype=np.float32))
+        _, truth = exact.search(queries, args.top_k)
+        for ef_search in map(int, args.eval_ef_search.split(',')):
+            start = time.time()
+            _, candidates = indexer.search_knn(queries, args.top_k, ef_search=ef_search)
+            print('efSearch {}: recall@{} {:.4f} ({:.2f} ms/query)'.format(
+                ef_search, args.top_k, recall(truth, candidates), 1000 * (time.time() - start) / len(queries)))
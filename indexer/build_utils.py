@@ -0,0 +1,16 @@
+import numpy as np
+import faiss
+
+# Helpers shared by the offline index build scripts (build_hnsw.py, quantize_index.py, project_index.py).
+
+def load_vectors(path):
+    # a .npy (n, d) float32 matrix (memory-mapped) or the vectors of a DenseFlatIndexer file
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    flat = faiss.read_index(path)
+    return flat.reconstruct_n(0, flat.ntotal)
+
+def recall(truth, candidates):
+    # mean fraction of the exact neighbors found, -1 being the padding of faiss
+    hits = [len(set(t[t != -1]).intersection(c[c != -1])) / max(1, (t != -1).sum()) for t, c in zip(truth, candidates)]
+    return float(np.mean(hits))
@@ -0,0 +1,79 @@
+import argparse
+import gzip
+import os
+import time
+from itertools import islice
+import requests
+
+# Streams a KB into the rw index of a running indexer through /api/indexer/add/stream.
+# The input is a (optionally gzipped) NDJSON file, one item per line:
+# {"encoding": "<base64 float32>", "title": "...", "wikipedia_id": 12, "descr": "...", "type_": "PER"}
+# Lines are sent in requests of --request-lines lines. The indexer checkpoints the lines committed
+# for the ingest id, so running the same command again after an interruption resumes from there.
+
+def read_lines(path, skip):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as fd:
+        lines = (line for line in fd if line.strip())
+        for line in islice(lines, skip, None):
+            yield line
+
+def request_body(lines, n, sent):
+    for line in islice(lines, n):
+        sent[0] += 1
+        yield line if line.endswith(b'\n') else line + b'\n'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--url", type=str, default="http://127.0.0.1:30301", help="indexer url",
+    )
+    parser.add_argument(
+        "--input", type=str, required=True, help="ndjson (or .ndjson.gz) file of items",
+    )
+    parser.add_argument(
+        "--ingest-id", type=str, default=None, dest="ingest_id",
+        help="checkpoint key of the ingestion (default: input file name)",
+    )
+    parser.add_argument(
+        "--request-lines", type=int, default=100000, dest="request_lines",
+        help="lines streamed per request",
+    )
+
+    args = parser.parse_args()
+
+    ingest_id = args.ingest_id or os.path.basename(args.input)
+    session = requests.Session()
+
+    res = session.get(args.url + '/api/indexer/add/stream/' + ingest_id)
+    res.raise_for_status()
+    offset = res.json()['lines']
+    if offset > 0:
+        print('Resuming {} from line {}...'.format(ingest_id, offset))
+
+    lines = read_lines(args.input, offset)
+    start = time.time()
+    added = 0
+    while True:
+        sent = [0]
+        res = session.post(args.url + '/api/indexer/add/stream',
+            params={'ingest_id': ingest_id, 'offset': offset, 'compact': 'false'},
+            data=request_body(lines, args.request_lines, sent),
+            headers={'Content-Type': 'application/x-ndjson'})
+        res.raise_for_status()
+        res = res.json()
+        offset = res['lines']
+        added += res['added']
+        if sent[0] > 0:
+            print('Line {}: added {} ({:.0f} vectors/s, overall {:.0f} vectors/s)'.format(
+                offset, res['added'], res['vectors_per_sec'], added / (time.time() - start)))
+        if sent[0] < args.request_lines:
+            break
+
+    # the index base file is written once at the end
+    res = session.post(args.url + '/api/indexer/add/stream',
+        params={'ingest_id': ingest_id, 'offset': offset, 'compact': 'true'}, data=b'')
+    res.raise_for_status()
+
+    print('Done. Added {} vectors in {:.1f}s ({:.0f} vectors/s)'.format(
+        added, time.time() - start, added / max(time.time() - start, 1e-9)))
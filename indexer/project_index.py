@@ -0,0 +1,147 @@
+import argparse
+import os
+import time
+import numpy as np
+import faiss
+from main import DenseFlatIndexer, HNSWIndexer, ProjectedIndexer, projection_path, vectors_path
+from build_utils import load_vectors, recall
+
+# Builds a projected flat/hnswip index (e.g. --index flat+models/kb_256.faiss+0+ro) from the full KB vectors:
+# a DenseFlatIndexer file or a .npy (n, d) float32 matrix (memory-mapped).
+# Writes <output> (index of the reduced vectors), <output>.projection.npz (the projection, applied
+# by the indexer to the queries) and <output>.vectors.npy (full vectors for --projection-rerank).
+# pca is the uncentered PCA (the top eigenvectors of E[x x^T]) so that the dot products are preserved;
+# random is a random orthogonal projection scaled by sqrt(d / dim), it needs no training but loses more recall.
+# Measures the recall@k against the exact search on the full vectors, with and without the re-ranking:
+# the reduced index takes dim / d of the memory and is searched faster, the re-ranking recovers most of the
+# recall at the cost of reading rerank_factor * top_k full vectors per query.
+
+def train_projection(vectors, dim, method, rng):
+    d = vectors.shape[1]
+    assert dim < d, 'Error! --dim must be smaller than the vector size ({}).'.format(d)
+    if method == 'pca':
+        moments = np.zeros((d, d), dtype=np.float64)
+        for i in range(0, len(vectors), 10000):
+            batch = np.asarray(vectors[i:i + 10000], dtype=np.float64)
+            moments += batch.T @ batch
+        eigenvalues, eigenvectors = np.linalg.eigh(moments / len(vectors))
+        # eigh sorts the eigenvalues in ascending order
+        matrix = eigenvectors[:, ::-1][:, :dim]
+        print('Kept {:.2%} of the energy.'.format(eigenvalues[::-1][:dim].sum() / eigenvalues.sum()))
+    elif method == 'random':
+        matrix, _ = np.linalg.qr(rng.standard_normal((d, dim)))
+        matrix = matrix * np.sqrt(d / dim)
+    else:
+        raise ValueError("Error! Unsupported projection! Choose from pca,random.")
+    return np.ascontiguousarray(matrix, dtype=np.float32)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input", type=str, required=True, help="DenseFlatIndexer file or .npy matrix of the full vectors",
+    )
+    parser.add_argument(
+        "--output", type=str, required=True, help="projected index file to write",
+    )
+    parser.add_argument(
+        "--type", type=str, default="flat", help="flat or hnswip",
+    )
+    parser.add_argument(
+        "--dim", type=int, default=256, help="size of the projected vectors (e.g. 256 or 384)",
+    )
+    parser.add_argument(
+        "--method", type=str, default="pca", help="pca or random",
+    )
+    parser.add_argument(
+        "--train-size", type=int, default=200000, help="vectors sampled for training", dest="train_size",
+    )
+    parser.add_argument(
+        "--m", type=int, default=32, help="hnswip: neighbors per node of the graph",
+    )
+    parser.add_argument(
+        "--ef-construction", type=int, default=200, dest="ef_construction", help="hnswip: candidate list size while inserting",
+    )
+    parser.add_argument(
+        "--ef-search", type=int, default=128, dest="ef_search", help="hnswip: efSearch saved in the index",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100000, help="vectors added per batch", dest="batch_size",
+    )
+    parser.add_argument(
+        "--queries", type=str, default=None, help="optional .npy of query encodings for the recall evaluation (default: sampled kb vectors)",
+    )
+    parser.add_argument(
+        "--eval-size", type=int, default=1000, help="queries used for the recall evaluation", dest="eval_size",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=10, help="top_k of the recall evaluation", dest="top_k",
+    )
+    parser.add_argument(
+        "--rerank-factor", type=int, default=4, help="over-fetch factor of the recall evaluation", dest="rerank_factor",
+    )
+
+    args = parser.parse_args()
+
+    print('Loading vectors from {}...'.format(args.input))
+    vectors = load_vectors(args.input)
+    ntotal, d = vectors.shape
+
+    print('Writing {} full vectors to {}...'.format(ntotal, vectors_path(args.output)))
+    full = np.lib.format.open_memmap(vectors_path(args.output), mode='w+', dtype=np.float32, shape=(ntotal, d))
+    for i in range(0, ntotal, args.batch_size):
+        full[i:i + args.batch_size] = vectors[i:i + args.batch_size]
+    full.flush()
+
+    rng = np.random.default_rng(0)
+    train_ids = np.sort(rng.choice(ntotal, min(args.train_size, ntotal), replace=False))
+    print('Training {} projection {} -> {} on {} vectors...'.format(args.method, d, args.dim, len(train_ids)))
+    start = time.time()
+    matrix = train_projection(full[train_ids], args.dim, args.method, rng)
+    np.savez(projection_path(args.output), matrix=matrix, method=args.method)
+    print('Trained in {:.1f}s'.format(time.time() - start))
+
+    if args.type == 'flat':
+        indexer = DenseFlatIndexer(args.dim)
+    elif args.type == 'hnswip':
+        indexer = HNSWIndexer(args.dim, args.m, args.ef_construction, args.ef_search)
+    else:
+        raise ValueError("Error! Unsupported index type! Choose from flat,hnswip.")
+
+    print('Adding projected vectors...')
+    start = time.time()
+    for i in range(0, ntotal, args.batch_size):
+        indexer.index.add(np.ascontiguousarray(full[i:i + args.batch_size] @ matrix))
+    faiss.write_index(indexer.index, args.output)
+    print('Built in {:.1f}s'.format(time.time() - start))
+
+    full_size = ntotal * d * 4
+    projected_size = os.path.getsize(args.output)
+    print('Memory: full {:.1f} MB, projected {} {:.1f} MB ({:.1f}x smaller)'.format(
+        full_size / 2**20, args.type, projected_size / 2**20, full_size / max(1, projected_size)))
+
+    # recall of the projected index against the exact search on the full vectors
+    if args.queries:
+        queries = np.load(args.queries).astype(np.float32)[:args.eval_size]
+    else:
+        queries = np.ascontiguousarray(full[np.sort(rng.choice(ntotal, min(args.eval_size, ntotal), replace=False))])
+    exact = faiss.IndexFlatIP(d)
+    for i in range(0, ntotal, args.batch_size):
+        exact.add(np.ascontiguousarray(full[i:i + args.batch_size]))
+    start = time.time()
+    _, truth = exact.search(queries, args.top_k)
+    exact_time = time.time() - start
+
+    projected = ProjectedIndexer(indexer, matrix, np.load(vectors_path(args.output), mmap_mode='r'), args.rerank_factor)
+    start = time.time()
+    _, candidates = projected.search_knn(queries, args.top_k)
+    projected_time = time.time() - start
+    projected.rerank = True
+    start = time.time()
+    _, reranked = projected.search_knn(queries, args.top_k)
+    rerank_time = time.time() - start
+
+    print('Exact full search: {:.2f} ms/query'.format(1000 * exact_time / len(queries)))
+    print('Recall@{} projected only: {:.4f} ({:.2f} ms/query)'.format(
+        args.top_k, recall(truth, candidates), 1000 * projected_time / len(queries)))
+    print('Recall@{} re-ranked x{}: {:.4f} ({:.2f} ms/query)'.format(
+        args.top_k, args.rerank_factor, recall(truth, reranked), 1000 * rerank_time / len(queries)))
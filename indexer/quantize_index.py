@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+import numpy as np
+import faiss
+from main import QuantizedIndexer, vectors_path
+from build_utils import recall
+
+# Converts a DenseFlatIndexer file into a compressed ivfpq/sq8 index for the indexer
+# (e.g. --index ivfpq+models/kb_ivfpq.faiss+0+ro) and measures the recall against the flat index.
+# Writes <output> (faiss codes) and <output>.vectors.npy (full vectors used for the exact re-ranking).
+
+def build_index(index_type, dim, args):
+    if index_type == 'ivfpq':
+        quantizer = faiss.IndexFlatIP(dim)
+        return faiss.IndexIVFPQ(quantizer, dim, args.nlist, args.m, args.nbits, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == 'sq8':
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError("Error! Unsupported index type! Choose from ivfpq,sq8.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input", type=str, required=True, help="DenseFlatIndexer file to convert",
+    )
+    parser.add_argument(
+        "--output", type=str, required=True, help="compressed index file to write",
+    )
+    parser.add_argument(
+        "--type", type=str, default="ivfpq", help="ivfpq or sq8",
+    )
+    parser.add_argument(
+        "--nlist", type=int, default=4096, help="ivfpq: number of inverted lists",
+    )
+    parser.add_argument(
+        "--m", type=int, default=64, help="ivfpq: number of sub-quantizers (bytes per vector with 8 bits)",
+    )
+    parser.add_argument(
+        "--nbits", type=int, default=8, help="ivfpq: bits per sub-quantizer code",
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=32, help="ivfpq: inverted lists visited per query (saved in the index)",
+    )
+    parser.add_argument(
+        "--train-size", type=int, default=200000, help="vectors sampled for training", dest="train_size",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100000, help="vectors added per batch", dest="batch_size",
+    )
+    parser.add_argument(
+        "--queries", type=str, default=None, help="optional .npy of query encodings for the recall evaluation (default: sampled kb vectors)",
+    )
+    parser.add_argument(
+        "--eval-size", type=int, default=1000, help="queries used for the recall evaluation", dest="eval_size",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=10, help="top_k of the recall evaluation", dest="top_k",
+    )
+    parser.add_argument(
+        "--rerank-factor", type=int, default=4, help="over-fetch factor of the recall evaluation", dest="rerank_factor",
+    )
+
+    args = parser.parse_args()
+
+    print('Loading flat index from {}...'.format(args.input))
+    flat = faiss.read_index(args.input)
+    ntotal, dim = flat.ntotal, flat.d
+
+    print('Writing {} full vectors to {}...'.format(ntotal, vectors_path(args.output)))
+    vectors = np.lib.format.open_memmap(vectors_path(args.output), mode='w+', dtype=np.float32, shape=(ntotal, dim))
+    for i in range(0, ntotal, args.batch_size):
+        n = min(args.batch_size, ntotal - i)
+        vectors[i:i + n] = flat.reconstruct_n(i, n)
+    vectors.flush()
+
+    index = build_index(args.type, dim, args)
+    rng = np.random.default_rng(0)
+    if not index.is_trained:
+        train_ids = np.sort(rng.choice(ntotal, min(args.train_size, ntotal), replace=False))
+        print('Training {} index on {} vectors...'.format(args.type, len(train_ids)))
+        start = time.time()
+        index.train(np.ascontiguousarray(vectors[train_ids]))
+        print('Trained in {:.1f}s'.format(time.time() - start))
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = args.nprobe
+
+    print('Adding vectors...')
+    for i in range(0, ntotal, args.batch_size):
+        index.add(np.ascontiguousarray(vectors[i:i + args.batch_size]))
+    faiss.write_index(index, args.output)
+
+    flat_size = ntotal * dim * 4
+    codes_size = os.path.getsize(args.output)
+    print('Memory: flat {:.1f} MB, {} {:.1f} MB ({:.1f}x smaller)'.format(
+        flat_size / 2**20, args.type, codes_size / 2**20, flat_size / max(1, codes_size)))
+
+    # recall of the compressed index against the exact flat search
+    if args.queries:
+        queries = np.load(args.queries).astype(np.float32)[:args.eval_size]
+    else:
+        queries = np.ascontiguousarray(vectors[np.sort(rng.choice(ntotal, min(args.eval_size, ntotal), replace=False))])
+    _, truth = flat.search(queries, args.top_k)
+
+    quantized = QuantizedIndexer(args.rerank_factor)
+    quantized.deserialize_from(args.output)
+
+    start = time.time()
+    _, candidates = quantized.index.search(queries, args.top_k)
+    codes_time = time.time() - start
+    start = time.time()
+    _, reranked = quantized.search_knn(queries, args.top_k)
+    rerank_time = time.time() - start
+
+    print('Recall@{} codes only: {:.4f} ({:.2f} ms/query)'.format(
+        args.top_k, recall(truth, candidates), 1000 * codes_time / len(queries)))
+    print('Recall@{} re-ranked x{}: {:.4f} ({:.2f} ms/query)'.format(
+        args.top_k, args.rerank_factor, recall(truth, reranked), 1000 * rerank_time / len(queries)))
@@ -8,7 +8,18 @@ CREATE TABLE IF NOT EXISTS entities (
     descr TEXT,
     type_ varchar(20),
     PRIMARY KEY (id, indexer)
-);
+) PARTITION BY LIST (indexer);
+
+-- one partition per indexer (entities_<indexer>, created by the indexer at startup),
+-- existing databases are migrated with partition_entities.py
+CREATE TABLE IF NOT EXISTS entities_default PARTITION OF entities DEFAULT;
 
 CREATE INDEX IF NOT EXISTS entities_wikipedia_id ON public.entities USING btree (wikipedia_id);
 CREATE INDEX IF NOT EXISTS entities_wikidata_qid ON public.entities USING btree (wikidata_qid);
+
+CREATE TABLE IF NOT EXISTS entity_props (
+    wikipedia_id INT NOT NULL,
+    extract TEXT,
+    thumbnail TEXT,
+    PRIMARY KEY (wikipedia_id)
+);